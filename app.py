@@ -1,9 +1,29 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+"""Sleep tracker Flask application.
+
+Queries that load many records for a single page (e.g. index()) use
+raiseload('*') so that accidental lazy loading raises instead of silently
+issuing one query per row. Future relationships on the models should be
+declared with back_populates and lazy='selectin' instead of backref or
+lazy='dynamic'.
+"""
+from flask import Flask, render_template, request, redirect, url_for, make_response
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, timedelta
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.orm import load_only, raiseload
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
-import pytz
+import csv
+import hashlib
+import io
+import orjson
 import os
+import sqlite3
+import threading
+from collections import OrderedDict
 
 # Load environment variables
 load_dotenv()
@@ -15,42 +35,146 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default-secret-key')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///sleep_tracker.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_pre_ping': True,
+}
+database_url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+# Baza SQLite w pamięci używa StaticPool, który nie przyjmuje rozmiaru puli
+if not (database_url.get_backend_name() == 'sqlite' and database_url.database in (None, '', ':memory:')):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update({'pool_size': 10, 'max_overflow': 20})
+if database_url.get_backend_name() == 'sqlite':
+    # Połączenia z puli są współdzielone między wątkami serwera
+    app.config['SQLALCHEMY_ENGINE_OPTIONS']['connect_args'] = {'check_same_thread': False}
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Enable WAL and larger caches for SQLite connections"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    # WAL pozwala czytać stronę główną w trakcie zapisu drzemki
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.execute('PRAGMA cache_size=-20000')
+    cursor.close()
+
+# Skompilowane szablony są zapisywane w katalogu tymczasowym i współdzielone między procesami
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
 
 # Initialize extensions
 db = SQLAlchemy(app)
 
 # Dodaj strefę czasową dla Polski
-local_tz = pytz.timezone('Europe/Warsaw')
+local_tz = ZoneInfo('Europe/Warsaw')
+
+# Początek doby, używany przy budowaniu zakresów [początek dnia, następny dzień)
+_DAY_START = time(0, 0, 0)
+
+def orjsonify(obj, status=200):
+    """Build a JSON response serialized with orjson"""
+    # orjson serializuje też obiekty datetime (ISO 8601 ze strefą czasową)
+    return app.response_class(orjson.dumps(obj), status=status, mimetype='application/json')
 
 # Funkcja zwracająca aktualny czas w strefie czasowej warszawskiej
 def get_current_warsaw_time():
-    # Zamiast używać datetime.now(pytz.UTC), użyjmy datetime.utcnow()
-    # i jawnie ustawmy strefę czasową UTC
-    utc_now = datetime.utcnow().replace(tzinfo=pytz.UTC)
-    
-    # Konwertuj do strefy czasowej warszawskiej
-    warsaw_time = utc_now.astimezone(local_tz)
-    
-    return warsaw_time
+    # zoneinfo poprawnie obsługuje zmianę czasu, więc nie trzeba przechodzić przez UTC
+    return datetime.now(local_tz)
 
 class SleepRecord(db.Model):
     """Model for sleep records"""
     __tablename__ = 'sleep_records'
 
     id = db.Column(db.Integer, primary_key=True)
-    sleep_time = db.Column(db.DateTime, nullable=False)
-    wake_time = db.Column(db.DateTime, nullable=False)
+    sleep_time = db.Column(db.DateTime, nullable=False, index=True)
+    wake_time = db.Column(db.DateTime, nullable=False, index=True)
     notes = db.Column(db.String(200))
     sleep_rating = db.Column(db.Integer, nullable=True)  # Rating from 1-5 stars
     is_rated = db.Column(db.Boolean, default=False)  # Flag to track if sleep has been rated
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Indeks wyrażeniowy dla grupowania po dniu w /stats
+        db.Index('ix_sleep_records_sleep_date', db.func.date(sleep_time)),
+    )
+
     @property
     def sleep_duration(self):
         """Calculate sleep duration in hours"""
         duration = self.wake_time - self.sleep_time
         return round(duration.total_seconds() / 3600, 2)
 
+# Licznik drzemek dla ostatnio używanego dnia - dzięki temu /stop_nap nie liczy
+# drzemek w bazie przy każdym zapisie, a jedynie raz na dzień (na proces)
+_naps_cache = {'date': None, 'count': 0}
+_naps_cache_lock = threading.Lock()
+
+def count_naps_on(day, exclude_id=None):
+    """Count naps (shorter than 4h) started on the given day"""
+    # Jawne SELECT count(*) zamiast Query.count(), które opakowuje całe
+    # zapytanie w podzapytanie ze wszystkimi kolumnami
+    start_of_day = datetime.combine(day, _DAY_START)
+    stmt = db.select(db.func.count()).select_from(SleepRecord).where(
+        SleepRecord.sleep_time >= start_of_day,
+        SleepRecord.sleep_time < start_of_day + timedelta(days=1),
+        (SleepRecord.wake_time - SleepRecord.sleep_time) <= timedelta(hours=4)  # tylko drzemki
+    )
+    if exclude_id is not None:
+        stmt = stmt.where(SleepRecord.id != exclude_id)
+    return db.session.execute(stmt).scalar()
+
+def invalidate_naps_cache(*days):
+    """Drop the cached nap counter if it refers to one of the given days"""
+    with _naps_cache_lock:
+        if _naps_cache['date'] in days:
+            _naps_cache['date'] = None
+
+# Wyrenderowane strony dla minionych dni, unieważniane przez _data_version,
+# który rośnie przy każdej zmianie danych. Dzisiejszej strony nie cache'ujemy,
+# bo zawiera tykający licznik "Od ostatniej drzemki minęło"
+_PAGE_CACHE_SIZE = 64
+_page_cache = OrderedDict()
+_data_version = 0
+# Losowy znacznik procesu w ETagu - po restarcie _data_version liczy od zera
+_cache_epoch = os.urandom(8).hex()
+_page_cache_lock = threading.Lock()
+
+def bump_data_version():
+    """Mark cached pages as stale after a write"""
+    global _data_version
+    with _page_cache_lock:
+        _data_version += 1
+        _page_cache.clear()
+
+def get_cached_page(key):
+    """Return cached HTML for the key or None"""
+    with _page_cache_lock:
+        html = _page_cache.get(key)
+        if html is not None:
+            _page_cache.move_to_end(key)
+        return html
+
+def page_response(key, html):
+    """Wrap cached page HTML in a response that honours If-None-Match"""
+    etag = hashlib.blake2b(f"{_cache_epoch}:{key}".encode(), digest_size=8).hexdigest()
+    response = make_response(html)
+    response.set_etag(etag)
+    # Przeglądarka musi pytać o aktualność strony, ale może dostać 304 bez treści
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def store_cached_page(key, html):
+    """Store rendered HTML, evicting least recently used pages"""
+    with _page_cache_lock:
+        # Pomijamy strony wyrenderowane przed ostatnią zmianą danych
+        if key[-1] != _data_version:
+            return
+        _page_cache[key] = html
+        _page_cache.move_to_end(key)
+        while len(_page_cache) > _PAGE_CACHE_SIZE:
+            _page_cache.popitem(last=False)
+
 @app.route('/')
 def index():
     """Home page route"""
@@ -58,42 +182,60 @@ def index():
         # Get selected date from query parameters or use today
         selected_date_str = request.args.get('date')
         # Używamy aktualnego czasu w strefie czasowej warszawskiej
-        today = get_current_warsaw_time().date()
+        now_local = get_current_warsaw_time()
+        today = now_local.date()
         
         if selected_date_str:
             selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d').date()
         else:
             selected_date = today
 
+        # Strona minionego dnia zależy tylko od danych i od dzisiejszej daty (limit kalendarza)
+        cache_key = None
+        if selected_date != today:
+            cache_key = (selected_date, today, _data_version)
+            html = get_cached_page(cache_key)
+            if html is not None:
+                return page_response(cache_key, html)
+
         # Get records for selected date
-        start_of_day = datetime.combine(selected_date, datetime.min.time())
-        end_of_day = datetime.combine(selected_date, datetime.max.time())
+        start_of_day = datetime.combine(selected_date, _DAY_START)
+        # Przedział półotwarty [start, następny dzień) - prosty zakres dla indeksu
+        end_of_day = start_of_day + timedelta(days=1)
         
         # Pobierz rekordy, które:
         # 1. Są drzemkami (krótsze niż 4h) i zaczynają się w wybranym dniu
         # 2. Są snem nocnym (dłuższe niż 4h) i kończą się w wybranym dniu
         records = []
+        # Czas trwania (w sekundach) liczony raz na rekord, używany też przez szablon
+        durations = {}
         
         # Najpierw pobierz wszystkie rekordy, które mogą być związane z wybranym dniem
-        all_possible_records = SleepRecord.query.filter(
-            ((SleepRecord.sleep_time >= start_of_day) & (SleepRecord.sleep_time <= end_of_day)) |  # zaczynają się w wybranym dniu
-            ((SleepRecord.wake_time >= start_of_day) & (SleepRecord.wake_time <= end_of_day))      # kończą się w wybranym dniu
-        ).all()
+        # Ładujemy tylko kolumny używane przez widok (bez created_at)
+        all_possible_records = SleepRecord.query.options(
+            load_only(SleepRecord.id, SleepRecord.sleep_time, SleepRecord.wake_time,
+                      SleepRecord.notes, SleepRecord.sleep_rating, SleepRecord.is_rated),
+            raiseload('*')  # bez leniwego ładowania - stała liczba zapytań na żądanie
+        ).filter(
+            ((SleepRecord.sleep_time >= start_of_day) & (SleepRecord.sleep_time < end_of_day)) |  # zaczynają się w wybranym dniu
+            ((SleepRecord.wake_time >= start_of_day) & (SleepRecord.wake_time < end_of_day))      # kończą się w wybranym dniu
+        ).order_by(
+            SleepRecord.sleep_time.desc()  # od najnowszego - sortowane są tylko wiersze z danego dnia
+        )
         
         # Następnie przefiltruj je zgodnie z zasadami
         for record in all_possible_records:
-            # Oblicz czas trwania snu w godzinach
-            sleep_duration = (record.wake_time - record.sleep_time).total_seconds() / 3600
+            # Oblicz czas trwania snu w sekundach
+            sleep_duration = (record.wake_time - record.sleep_time).total_seconds()
             
             # Jeśli to drzemka (krótszy niż 4h), sprawdź czy zaczyna się w wybranym dniu
-            if sleep_duration <= 4 and record.sleep_time.date() == selected_date:
+            if sleep_duration <= 4 * 3600 and record.sleep_time.date() == selected_date:
                 records.append(record)
+                durations[record.id] = sleep_duration
             # Jeśli to sen nocny (dłuższy niż 4h), sprawdź czy kończy się w wybranym dniu
-            elif sleep_duration > 4 and record.wake_time.date() == selected_date:
+            elif sleep_duration > 4 * 3600 and record.wake_time.date() == selected_date:
                 records.append(record)
-        
-        # Sortuj rekordy według czasu rozpoczęcia, od najnowszego
-        records.sort(key=lambda x: x.sleep_time, reverse=True)
+                durations[record.id] = sleep_duration
         
         time_since_last = None
         
@@ -103,7 +245,7 @@ def index():
         total_nap_minutes = 0
         
         for record in records:
-            sleep_duration = (record.wake_time - record.sleep_time).total_seconds()
+            sleep_duration = durations[record.id]
             # Jeśli to drzemka (krótszy niż 4h)
             if sleep_duration <= 4 * 3600:
                 naps_today += 1
@@ -121,21 +263,23 @@ def index():
             today_records = [r for r in records if r.wake_time.date() == today]
             if today_records:
                 last_wake = today_records[0].wake_time
-                # Używamy aktualnego czasu w strefie czasowej warszawskiej
-                current_time = get_current_warsaw_time().replace(tzinfo=None)
-                time_diff = current_time - last_wake
-                hours = int(time_diff.total_seconds() // 3600)
-                minutes = int((time_diff.total_seconds() % 3600) // 60)
+                total = int((now_local.replace(tzinfo=None) - last_wake).total_seconds())
+                hours, minutes = divmod(total // 60, 60)
                 time_since_last = {'hours': hours, 'minutes': minutes}
             
-        return render_template('index.html', 
+        html = render_template('index.html', 
                              records=records, 
+                             durations=durations,
                              time_since_last=time_since_last,
                              naps_today=naps_today,
                              total_nap_hours=total_nap_hours,
                              total_nap_minutes=total_nap_minutes,
                              selected_date=selected_date,
                              today=today)
+        if cache_key is not None:
+            store_cached_page(cache_key, html)
+            return page_response(cache_key, html)
+        return html
     except Exception as e:
         app.logger.error(f"Error fetching records: {str(e)}")
         return render_template('error.html', message="Nie udało się pobrać zapisów.")
@@ -145,8 +289,8 @@ def add_record():
     """Add new sleep record route"""
     if request.method == 'POST':
         try:
-            sleep_time = datetime.strptime(request.form['sleep_time'], '%Y-%m-%dT%H:%M')
-            wake_time = datetime.strptime(request.form['wake_time'], '%Y-%m-%dT%H:%M')
+            sleep_time = datetime.fromisoformat(request.form['sleep_time'])
+            wake_time = datetime.fromisoformat(request.form['wake_time'])
             notes = request.form['notes']
 
             if wake_time <= sleep_time:
@@ -166,11 +310,7 @@ def add_record():
                     # Dla drzemek liczymy drzemki z dnia rozpoczęcia
                     today = sleep_time.date()
                     # Policz dzisiejsze drzemki
-                    naps_today = SleepRecord.query.filter(
-                        SleepRecord.sleep_time >= datetime.combine(today, datetime.min.time()),
-                        SleepRecord.sleep_time < datetime.combine(today, datetime.max.time()),
-                        (SleepRecord.wake_time - SleepRecord.sleep_time) <= timedelta(hours=4)  # tylko drzemki
-                    ).count()
+                    naps_today = count_naps_on(today)
                     
                     notes = f"Drzemka nr {naps_today + 1}"
             
@@ -181,6 +321,8 @@ def add_record():
             )
             db.session.add(record)
             db.session.commit()
+            invalidate_naps_cache(sleep_time.date())
+            bump_data_version()
             return redirect(url_for('index'))
         
         except Exception as e:
@@ -190,6 +332,67 @@ def add_record():
     
     return render_template('add.html')
 
+def import_records(rows):
+    """Insert many sleep records in a single batch"""
+    db.session.bulk_insert_mappings(SleepRecord, rows)
+    db.session.commit()
+
+@app.route('/import', methods=['GET', 'POST'])
+def import_csv():
+    """Import sleep records from a CSV file (sleep_time, wake_time, notes)"""
+    if request.method == 'POST':
+        try:
+            upload = request.files.get('file')
+            if not upload or not upload.filename:
+                return render_template('import.html', error="Wybierz plik CSV.")
+            
+            rows = []
+            # Kolejne numery drzemek dla każdego dnia - start od liczby drzemek już zapisanych
+            nap_numbers = {}
+            reader = csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig'))
+            for line_no, row in enumerate(reader, start=2):
+                sleep_time = datetime.fromisoformat(row['sleep_time'])
+                wake_time = datetime.fromisoformat(row['wake_time'])
+                if wake_time <= sleep_time:
+                    return render_template('import.html', error=f"Wiersz {line_no}: czas pobudki musi być późniejszy niż czas zaśnięcia.")
+                
+                notes = (row.get('notes') or '').strip()
+                is_nap = (wake_time - sleep_time).total_seconds() <= 4 * 3600
+                # Każda drzemka zajmuje numer, tak jak w count_naps_on, niezależnie od notatki
+                if is_nap:
+                    day = sleep_time.date()
+                    if day not in nap_numbers:
+                        nap_numbers[day] = count_naps_on(day)
+                    nap_numbers[day] += 1
+                
+                # Standardowe opisy (np. z wyeksportowanego pliku) nadajemy od nowa, jak w add_record
+                is_standard_note = not notes or notes == "Sen nocny" or notes.startswith("Drzemka nr")
+                if is_standard_note:
+                    notes = f"Drzemka nr {nap_numbers[day]}" if is_nap else "Sen nocny"
+                
+                rows.append({
+                    'sleep_time': sleep_time,
+                    'wake_time': wake_time,
+                    'notes': notes,
+                    'is_rated': False,
+                    'created_at': datetime.utcnow()
+                })
+            
+            if not rows:
+                return render_template('import.html', error="Plik nie zawiera żadnych wpisów.")
+            
+            import_records(rows)
+            invalidate_naps_cache(*{row['sleep_time'].date() for row in rows})
+            bump_data_version()
+            return redirect(url_for('index'))
+        
+        except Exception as e:
+            app.logger.error(f"Error importing records: {str(e)}")
+            db.session.rollback()
+            return render_template('import.html', error="Wystąpił błąd podczas importu pliku.")
+    
+    return render_template('import.html')
+
 @app.route('/start_nap', methods=['POST'])
 def start_nap():
     """Start new nap"""
@@ -199,17 +402,18 @@ def start_nap():
         
         # Zwracamy czas w formacie ISO z informacją o strefie czasowej
         # Dzięki temu przeglądarka będzie wiedziała, że to czas w strefie warszawskiej
-        return jsonify({
+        return orjsonify({
             'status': 'success',
-            'start_time': start_time.isoformat()
+            'start_time': start_time
         })
     except Exception as e:
         app.logger.error(f"Error starting nap: {str(e)}")
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+        return orjsonify({'status': 'error', 'message': str(e)}, status=500)
 
 @app.route('/stop_nap', methods=['POST'])
 def stop_nap():
     """Stop nap and save record"""
+    reserved_day = None
     try:
         data = request.get_json()
         
@@ -249,12 +453,15 @@ def stop_nap():
         else:
             # Dla drzemek liczymy drzemki z dnia rozpoczęcia
             today = sleep_time.date()
-            # Policz dzisiejsze drzemki
-            naps_today = SleepRecord.query.filter(
-                SleepRecord.sleep_time >= datetime.combine(today, datetime.min.time()),
-                SleepRecord.sleep_time < datetime.combine(today, datetime.max.time()),
-                (SleepRecord.wake_time - SleepRecord.sleep_time) <= timedelta(hours=4)  # tylko drzemki
-            ).count()
+            # Policz dzisiejsze drzemki - z bazy tylko przy pierwszym zapisie danego dnia
+            # Numer rezerwujemy pod blokadą, żeby równoległe zapisy nie dostały tego samego
+            with _naps_cache_lock:
+                if _naps_cache['date'] != today:
+                    _naps_cache['count'] = count_naps_on(today)
+                    _naps_cache['date'] = today
+                naps_today = _naps_cache['count']
+                _naps_cache['count'] += 1
+            reserved_day = today
             
             notes = f"Drzemka nr {naps_today + 1}"
         
@@ -267,17 +474,18 @@ def stop_nap():
         
         db.session.add(record)
         db.session.commit()
+        bump_data_version()
         
         # Jeśli to sen nocny, zwróć ID rekordu, aby można było przekierować do oceny
         if sleep_duration > 4:
-            return jsonify({
+            return orjsonify({
                 'status': 'success',
                 'message': 'Sen nocny zapisany',
                 'is_night_sleep': True,
                 'record_id': record.id
             })
         else:
-            return jsonify({
+            return orjsonify({
                 'status': 'success',
                 'message': 'Drzemka zapisana',
                 'is_night_sleep': False
@@ -285,15 +493,21 @@ def stop_nap():
     except Exception as e:
         app.logger.error(f"Error saving nap: {str(e)}")
         db.session.rollback()
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+        # Zarezerwowany numer drzemki nie został zapisany - licznik trzeba przeliczyć
+        if reserved_day is not None:
+            invalidate_naps_cache(reserved_day)
+        return orjsonify({'status': 'error', 'message': str(e)}, status=500)
 
 @app.route('/delete_record/<int:record_id>', methods=['POST'])
 def delete_record(record_id):
     """Delete sleep record"""
     try:
         record = SleepRecord.query.get_or_404(record_id)
+        record_date = record.sleep_time.date()
         db.session.delete(record)
         db.session.commit()
+        invalidate_naps_cache(record_date)
+        bump_data_version()
         return redirect(url_for('index'))
     except Exception as e:
         app.logger.error(f"Error deleting record: {str(e)}")
@@ -306,8 +520,9 @@ def edit_record(record_id):
     
     if request.method == 'POST':
         try:
-            record.sleep_time = datetime.strptime(request.form['sleep_time'], '%Y-%m-%dT%H:%M')
-            record.wake_time = datetime.strptime(request.form['wake_time'], '%Y-%m-%dT%H:%M')
+            previous_date = record.sleep_time.date()
+            record.sleep_time = datetime.fromisoformat(request.form['sleep_time'])
+            record.wake_time = datetime.fromisoformat(request.form['wake_time'])
             record.notes = request.form['notes']
             
             # Handle sleep rating if provided
@@ -337,16 +552,13 @@ def edit_record(record_id):
                     # Dla drzemek liczymy drzemki z dnia rozpoczęcia
                     today = record.sleep_time.date()
                     # Policz dzisiejsze drzemki
-                    naps_today = SleepRecord.query.filter(
-                        SleepRecord.sleep_time >= datetime.combine(today, datetime.min.time()),
-                        SleepRecord.sleep_time < datetime.combine(today, datetime.max.time()),
-                        (SleepRecord.wake_time - SleepRecord.sleep_time) <= timedelta(hours=4),  # tylko drzemki
-                        SleepRecord.id != record_id  # Wykluczamy aktualny rekord
-                    ).count()
+                    naps_today = count_naps_on(today, exclude_id=record_id)  # Wykluczamy aktualny rekord
                     
                     record.notes = f"Drzemka nr {naps_today + 1}"
             
             db.session.commit()
+            invalidate_naps_cache(previous_date, record.sleep_time.date())
+            bump_data_version()
             return redirect(url_for('index'))
         except Exception as e:
             app.logger.error(f"Error editing record: {str(e)}")
@@ -372,6 +584,7 @@ def rate_sleep(record_id):
                 record.sleep_rating = rating
                 record.is_rated = True
                 db.session.commit()
+                bump_data_version()
                 return redirect(url_for('index'))
             else:
                 return render_template('rate_sleep.html', record=record, error="Ocena musi być w zakresie 1-5.")
@@ -382,6 +595,25 @@ def rate_sleep(record_id):
     
     return render_template('rate_sleep.html', record=record)
 
+@app.route('/stats')
+def stats():
+    """Daily sleep totals"""
+    try:
+        # Agregacja po stronie bazy - jeden wiersz na dzień zamiast wszystkich rekordów
+        day = db.func.date(SleepRecord.sleep_time).label('day')
+        hours = (db.func.sum(
+            db.func.julianday(SleepRecord.wake_time) - db.func.julianday(SleepRecord.sleep_time)
+        ) * 24).label('hours')
+        days = db.session.execute(
+            db.select(day, hours, db.func.count().label('count'))
+            .group_by(day)
+            .order_by(day.desc())
+        ).all()
+        return render_template('stats.html', days=days)
+    except Exception as e:
+        app.logger.error(f"Error fetching stats: {str(e)}")
+        return render_template('error.html', message="Nie udało się pobrać statystyk.")
+
 @app.errorhandler(404)
 def not_found_error(error):
     """Handle 404 errors"""
@@ -393,12 +625,29 @@ def internal_error(error):
     db.session.rollback()
     return render_template('error.html', message="Wystąpił błąd serwera."), 500
 
+@app.cli.command('init-db')
+def init_db_command():
+    """Create database tables and indexes"""
+    init_db()
+    print("Baza danych zainicjalizowana.")
+
 def init_db():
     """Initialize the database"""
     with app.app_context():
         db.create_all()
+        # create_all() pomija istniejące tabele, więc indeksy dodane później
+        # trzeba utworzyć osobno (IF NOT EXISTS, bo refleksja nie widzi indeksów wyrażeniowych)
+        with db.engine.begin() as connection:
+            for index in SleepRecord.__table__.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+def warm_templates():
+    """Compile all templates up front so the first requests skip parsing"""
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
 
 if __name__ == '__main__':
+    # Serwer deweloperski - produkcyjnie aplikacja działa pod gunicornem (wsgi.py)
     init_db()
     app.run(
         host='0.0.0.0',
@@ -5,7 +5,7 @@ import os
 db_path = 'instance/sleep_tracker.db'
 
 def migrate_database():
-    """Migracja bazy danych - dodanie kolumn sleep_rating i is_rated"""
+    """Migracja bazy danych - dodanie kolumn sleep_rating i is_rated oraz indeksów na sleep_time i wake_time"""
     print("Rozpoczynam migrację bazy danych...")
     
     # Sprawdź, czy baza danych istnieje
@@ -36,6 +36,14 @@ def migrate_database():
         else:
             print("Kolumna is_rated już istnieje.")
         
+        # Dodaj indeksy na sleep_time i wake_time, używane przez filtrowanie i grupowanie po dniu
+        print("Dodaję indeks ix_sleep_records_sleep_time...")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_sleep_records_sleep_time ON sleep_records (sleep_time)")
+        print("Dodaję indeks ix_sleep_records_wake_time...")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_sleep_records_wake_time ON sleep_records (wake_time)")
+        print("Dodaję indeks ix_sleep_records_sleep_date...")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_sleep_records_sleep_date ON sleep_records (date(sleep_time))")
+        
         # Zatwierdź zmiany
         conn.commit()
         print("Migracja zakończona pomyślnie!")
@@ -0,0 +1,17 @@
+"""WSGI entry point.
+
+Przed pierwszym uruchomieniem utwórz tabele i indeksy:
+
+    flask init-db
+
+Następnie uruchom serwer:
+
+    gunicorn -w 1 -k gthread --threads 8 --preload wsgi:application
+
+Liczniki drzemek i cache stron są trzymane w pamięci procesu, dlatego
+używamy jednego workera z wieloma wątkami zamiast wielu procesów.
+"""
+from app import app, warm_templates
+
+warm_templates()
+application = app